@@ -1,106 +1,368 @@
 import sqlite3
-import matplotlib
-matplotlib.use('Agg')  # Use a non-interactive backend
+import contextlib
+import logging
+import threading
+import json
+
+DATABASE = "ensembl_hs63_simple.sqlite"
+
+logger = logging.getLogger(__name__)
+
+COLLECTION_PAGE_SIZE = 100 # rows per page of fetch_collection_of_genes
+_FETCH_BATCH_SIZE = 500 # rows pulled from SQLite at a time by _iter_rows
+
+_local = threading.local() # holds the persistent connection of each thread
+_initialized = False # set once the database-wide settings (WAL) have been applied
+# Caches derived from the database content. Results are published under _CACHE_LOCK,
+# and only if no write invalidated the caches while they were being read
+_CACHE_LOCK = threading.Lock()
+_cache_generation = 0 # bumped by _invalidate_caches
+_INDEX_CACHE = None # tuple of rows of fetch_for_index, None until the first call
+_GENE_EXISTS_CACHE = {} # gene ID -> bool, memoized results of check_gene_exists
+_GENE_EXISTS_CACHE_SIZE = 4096
+
+# Columns actually rendered by the templates and the Web API (no SELECT *)
+_GENE_COLUMNS = """g.Ensembl_Gene_ID, g.Associated_Gene_Name, g.Chromosome_Name, g.Band,
+        g.Strand, g.Gene_Start, g.Gene_End, g.Transcript_count"""
+_TRANSCRIPT_COLUMNS = """t.Ensembl_Transcript_ID, t.Ensembl_Gene_ID, t.Transcript_Start,
+        t.Transcript_End, t.Transcript_Biotype"""
+
+# Hot queries are kept as module-level constants so that the exact same SQL
+# text is submitted on every call and always hits the connection's statement cache.
+_SQL_FETCH_GENE = """
+        SELECT """ + _GENE_COLUMNS + """
+    FROM Genes as g
+    WHERE g.ensembl_gene_id = ?
+"""
+
+# Gene, transcripts and parts in a single statement: the transcripts and the
+# distinct parts come back as two JSON arrays next to the gene columns.
+_SQL_FETCH_GENE_FULL = """
+        SELECT """ + _GENE_COLUMNS + """,
+        (SELECT json_group_array(json_object(
+                'Ensembl_Transcript_ID', t.Ensembl_Transcript_ID,
+                'Ensembl_Gene_ID', t.Ensembl_Gene_ID,
+                'Transcript_Start', t.Transcript_Start,
+                'Transcript_End', t.Transcript_End,
+                'Transcript_Biotype', t.Transcript_Biotype))
+            FROM Transcripts as t
+            WHERE t.ensembl_gene_id = g.ensembl_gene_id) as transcripts_json,
+        (SELECT json_group_array(DISTINCT e.atlas_organism_part)
+            FROM Expression as e
+            INNER JOIN Transcripts t
+            ON e.ensembl_transcript_id = t.ensembl_transcript_id
+            WHERE t.ensembl_gene_id = g.ensembl_gene_id
+            AND e.atlas_organism_part IS NOT NULL) as parts_json
+    FROM Genes as g
+    WHERE g.ensembl_gene_id = ?
+"""
+
+_SQL_PLOT_GENE_PARTS = """
+        SELECT e.atlas_organism_part, COUNT(*) as count
+        FROM Expression e
+        INNER JOIN Transcripts t
+        ON e.ensembl_transcript_id = t.ensembl_transcript_id
+        WHERE t.ensembl_gene_id = ? AND e.atlas_organism_part IS NOT NULL
+        GROUP BY e.atlas_organism_part
+        ORDER BY count DESC
+"""
+
+_SQL_FETCH_TRANSCRIPT = """
+        SELECT """ + _TRANSCRIPT_COLUMNS + """
+    FROM Transcripts as t
+    WHERE t.ensembl_transcript_id = ?
+"""
+
+_SQL_FETCH_TRANSCRIPT_EXPRESSION = """
+        SELECT e.Atlas_Organism_Part
+    FROM Expression as e
+    WHERE e.ensembl_transcript_id = ? AND e.Atlas_Organism_Part IS NOT NULL
+"""
+
+_SQL_CHECK_GENE = """
+        SELECT 1
+    FROM Genes
+    WHERE ensembl_gene_id = ?
+"""
+
+_SQL_FETCH_INDEX_PARTS = """
+    SELECT DISTINCT atlas_organism_part FROM Expression WHERE atlas_organism_part IS NOT NULL ORDER BY "atlas_organism_part" ASC
+"""
+
+_SQL_FETCH_GENES_BY_PART = """
+        SELECT DISTINCT g.Ensembl_Gene_ID, g.Associated_Gene_Name
+    FROM Expression as e
+    JOIN Transcripts as t ON t.ensembl_transcript_id = e.ensembl_transcript_id
+    JOIN Genes as g ON g.ensembl_gene_id = t.ensembl_gene_id
+    WHERE e.atlas_organism_part = ?
+    ORDER BY g.ensembl_gene_id
+"""
+
+_SQL_FETCH_GENES_PAGE = """
+        SELECT """ + _GENE_COLUMNS + """
+    FROM Genes as g
+    WHERE g.ensembl_gene_id > ?
+    ORDER BY g.ensembl_gene_id
+    LIMIT ?
+"""
+
+# Write statements (same rationale: one SQL text per operation)
+_SQL_UPDATE_GENE_FROM_FORM = """
+            UPDATE Genes
+            SET Chromosome_Name = ?,
+                Band = ?,
+                Strand = ?,
+                Gene_Start = ?,
+                Gene_End = ?
+            WHERE ensembl_gene_id = ?
+"""
+
+_SQL_INSERT_GENE = """
+            INSERT INTO Genes (ensembl_gene_id, chromosome_name, band, gene_start, gene_end, strand, associated_gene_name)
+        VALUES (?, ?, ?, ?, ?, ?, ?)
+"""
+
+# Conflicting IDs are skipped instead of raising, and counted through rowcount
+_SQL_INSERT_GENE_IF_NEW = """
+            INSERT INTO Genes (ensembl_gene_id, chromosome_name, band, gene_start, gene_end, strand, associated_gene_name)
+        VALUES (?, ?, ?, ?, ?, ?, ?)
+        ON CONFLICT DO NOTHING
+"""
+
+_SQL_DELETE_GENE = """
+            DELETE FROM Genes
+        WHERE ensembl_gene_id = ?
+"""
+
+# Inserts the gene, or replaces its information if the ID already exists (unique index idx_genes_gid)
+_SQL_UPSERT_GENE = """
+            INSERT INTO Genes (ensembl_gene_id, chromosome_name, band, gene_start, gene_end, strand, associated_gene_name)
+        VALUES (?, ?, ?, ?, ?, ?, ?)
+        ON CONFLICT (ensembl_gene_id) DO UPDATE
+            SET Chromosome_Name = excluded.Chromosome_Name,
+                Band = excluded.Band,
+                Gene_Start = excluded.Gene_Start,
+                Gene_End = excluded.Gene_End,
+                Strand = excluded.Strand,
+                Associated_Gene_Name = excluded.Associated_Gene_Name
+"""
+
+def _connect():
+    """
+    Opens a new connection to the SQLite database, sets the row factory
+    to sqlite3.Row for dictionary-like access to rows and applies the tuning
+    PRAGMAs (WAL journal, relaxed fsync, in-memory temp store, larger page
+    cache without spilling, and memory-mapped I/O).
+    Returns:
+        sqlite3.Connection: The new database connection object.
+    """
+    global _initialized
+    conn = sqlite3.connect(DATABASE, check_same_thread=False, cached_statements=512)
+    conn.row_factory = sqlite3.Row
+    if not _initialized:
+        # journal_mode is stored in the database file: only needed once per process
+        conn.execute("PRAGMA journal_mode=WAL")
+        _initialized = True
+    # The following settings only last for the lifetime of the connection
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.execute("PRAGMA temp_store=MEMORY")
+    conn.execute("PRAGMA cache_size=-65536") # 64 MiB
+    conn.execute("PRAGMA mmap_size=268435456") # 256 MiB
+    conn.execute("PRAGMA cache_spill=OFF") # keep dirty pages of a write transaction in memory until commit
+    return conn
 
 def get_db_connection():
     """
-    Establishes a connection to the SQLite database and sets the row factory
-    to sqlite3.Row for dictionary-like access to rows.
+    Returns the database connection of the calling thread, opening it on first use.
+    Each thread (i.e. each worker serving requests, or a background job) keeps its
+    own connection open across calls and requests, so that connection setup and
+    PRAGMAs are paid once and SQLite's page cache stays warm.
+    Callers must not close the returned connection.
     Returns:
         sqlite3.Connection: The database connection object. 
     """
-    conn = sqlite3.connect("ensembl_hs63_simple.sqlite")
-    conn.row_factory = sqlite3.Row
+    conn = getattr(_local, "conn", None)
+    if conn is None:
+        conn = _local.conn = _connect()
     return conn
 
+def release_db_connection():
+    """
+    Returns the calling thread's connection to a clean state at the end of a
+    request: a transaction left open by a failed write is rolled back instead of
+    leaking into the next request served by the same thread (see tp4.release_db).
+    The connection itself stays open.
+    Returns:
+        None
+    """
+    conn = getattr(_local, "conn", None)
+    if conn is not None and conn.in_transaction:
+        conn.rollback()
+
+
+_SQL_CREATE_INDEXES = """
+    CREATE INDEX IF NOT EXISTS idx_expr_part ON Expression(Atlas_Organism_Part, Ensembl_Transcript_ID);
+    CREATE INDEX IF NOT EXISTS idx_expr_tid ON Expression(Ensembl_Transcript_ID, Atlas_Organism_Part);
+    CREATE INDEX IF NOT EXISTS idx_tr_gid ON Transcripts(Ensembl_Gene_ID);
+    CREATE UNIQUE INDEX IF NOT EXISTS idx_tr_tid ON Transcripts(Ensembl_Transcript_ID);
+    CREATE UNIQUE INDEX IF NOT EXISTS idx_genes_gid ON Genes(Ensembl_Gene_ID);
+"""
+
+def _invalidate_caches():
+    """
+    Helper function that:
+    Clears every module-level cache derived from the database content
+    (_INDEX_CACHE and _GENE_EXISTS_CACHE). Called by all mutating helpers,
+    in a finally clause so the caches never outlive a write, even a failed one.
+    The generation bump makes readers that started before the write drop
+    their (possibly stale) result instead of storing it.
+    Returns:
+        None
+    """
+    global _INDEX_CACHE, _cache_generation
+    with _CACHE_LOCK:
+        _cache_generation += 1
+        _INDEX_CACHE = None
+        _GENE_EXISTS_CACHE.clear()
+
+def _iter_rows(cursor):
+    """
+    Helper generator that:
+    Streams the rows of an executed cursor, fetching them _FETCH_BATCH_SIZE at a time
+    instead of materializing the whole result set with fetchall().
+    Args:
+        cursor (sqlite3.Cursor): A cursor on which a SELECT has been executed.
+    Yields:
+        sqlite3.Row: The rows of the result set.
+    """
+    while True:
+        batch = cursor.fetchmany(_FETCH_BATCH_SIZE)
+        if not batch:
+            break
+        yield from batch
+
+# Gene IDs stored more than once (possible with the bulk insert of earlier
+# versions, before the unique index existed)
+_SQL_FETCH_DUPLICATE_GENE_IDS = """
+        SELECT Ensembl_Gene_ID
+    FROM Genes
+    GROUP BY Ensembl_Gene_ID
+    HAVING COUNT(*) > 1
+    LIMIT 10
+"""
+
+def create_indexes():
+    """
+    One-shot schema migration creating the indexes used by the WHERE/JOIN
+    clauses of this module (organism part, transcript and gene IDs).
+    The Expression indexes hold both of its columns so joins through that
+    table are answered from the index alone.
+    Statistics are gathered with ANALYZE the first time so the query planner
+    picks the indexes. Safe to call on every startup.
+    Returns:
+        None
+    Raises:
+        sqlite3.IntegrityError: If the Genes table holds duplicate gene IDs, which
+            prevent the creation of the unique idx_genes_gid index (see readme).
+    """
+    conn = get_db_connection()
+    has_gene_index = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE name = 'idx_genes_gid'"
+    ).fetchone()
+    if has_gene_index is None:
+        duplicates = [row[0] for row in conn.execute(_SQL_FETCH_DUPLICATE_GENE_IDS)]
+        if duplicates:
+            raise sqlite3.IntegrityError(
+                "cannot create the unique index idx_genes_gid: duplicate Ensembl_Gene_ID "
+                "in Genes (e.g. " + ", ".join(duplicates) + "); remove the duplicate "
+                "rows first, see 'Database migration' in readme.md"
+            )
+    conn.executescript(_SQL_CREATE_INDEXES)
+    has_stats = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE name = 'sqlite_stat1'"
+    ).fetchone()
+    if has_stats is None:
+        conn.execute("ANALYZE")
+    conn.commit()
+    return
 
 def fetch_for_index():
     """
     Fetches distinct atlas organism parts from the Expression table.
+    The result is cached in _INDEX_CACHE after the first call.
     Returns:
-        list of sqlite3.Row: A list of rows containing distinct atlas organism parts.
+        tuple of sqlite3.Row: The rows containing distinct atlas organism parts.
     """
+    global _INDEX_CACHE
+    rows = _INDEX_CACHE
+    if rows is not None:
+        return rows
+    generation = _cache_generation
     conn = get_db_connection()
-    cursor = conn.cursor()
-    cursor.execute("""
-    SELECT DISTINCT atlas_organism_part FROM Expression WHERE atlas_organism_part IS NOT NULL ORDER BY "atlas_organism_part" ASC
-                   """)
-    rows = cursor.fetchall()
-    conn.close()
+    rows = tuple(conn.execute(_SQL_FETCH_INDEX_PARTS).fetchall())
+    with _CACHE_LOCK:
+        if generation == _cache_generation: # no write since the query started
+            _INDEX_CACHE = rows
     return rows
 
 def fetch_genes_by_part(part):
     """
     Fetches distinct genes and their associated names for a given atlas organism part.
+    The query runs immediately but rows are streamed from the thread's connection.
     Args:
         part (str): The atlas organism part to filter genes by.
     Returns:
-        list of sqlite3.Row: A list of rows containing distinct genes and their associated names.
+        generator of sqlite3.Row: The rows containing distinct genes and their associated names.
     """
     conn = get_db_connection()
     cursor = conn.cursor()
-    cursor.execute("""
-        SELECT DISTINCT g.ensembl_gene_id, associated_gene_name
-    FROM Genes as g
-    NATURAL JOIN Transcripts as t
-    NATURAL JOIN Expression as e
-    WHERE atlas_organism_part = ?
-    ORDER BY g.ensembl_gene_id
-                   """, (part,))
-    rows = cursor.fetchall()
-    print(rows[1].keys())
-    conn.close()
-    return rows
+    cursor.execute(_SQL_FETCH_GENES_BY_PART, (part,))
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug("fetch_genes_by_part(%r)", part)
+    return _iter_rows(cursor)
+
+def fetch_gene_row_only(gene_id):
+    """
+    Fetches only the gene information for a given gene ID (no transcripts, no parts).
+    Args:
+        gene_id (str): The Ensembl gene ID to fetch information for.
+    Returns:
+        sqlite3.Row: The gene information, or None if the gene ID does not exist.
+    """
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    cursor.execute(_SQL_FETCH_GENE, (gene_id,)) # same statement as fetch_gene_by_id, unique index lookup
+    return cursor.fetchone()
 
 def fetch_gene_by_id(gene_id):
     """
     Fetches gene information, its transcripts, and associated expression data for a given gene ID.
+    Everything is read with a single query (_SQL_FETCH_GENE_FULL).
     Args:
         gene_id (str): The Ensembl gene ID to fetch information for.
     Returns:
         tuple: A tuple containing:
-            - sqlite3.Row: The gene information.
-            - list of sqlite3.Row: A list of transcripts associated with the gene.
-            - list of sqlite3.Row: A list of distinct atlas organism parts where the gene is
-                expressed.
+            - dict: The gene information.
+            - list of dict: A list of transcripts associated with the gene.
+            - list of dict: A list of distinct atlas organism parts where the gene is
+                expressed, under the key "Atlas_Organism_Part".
+        If the gene ID does not exist, returns (None, None, None).
     """
     conn = get_db_connection()
-    cursor = conn.cursor()
-    cursor.execute("""
-        SELECT *
-    FROM Genes as g
-    WHERE g.ensembl_gene_id = ?
-                   """, (gene_id,))
-    row = cursor.fetchone()
+    row = conn.execute(_SQL_FETCH_GENE_FULL, (gene_id,)).fetchone()
 
     if row is None: # case where gene_id does not exist
-        conn.close()
         return None, None, None
-    
-    cursor.execute("""
-        SELECT *
-    FROM Transcripts as t
-    WHERE t.ensembl_gene_id = ?
-                     """, (gene_id,))
-    transcripts = cursor.fetchall()
-    list_of_transcript_ids = [
-        transcript['ensembl_transcript_id'] for transcript in transcripts
-    ]
-    row2 = transcripts
-    cursor.execute("""
-        SELECT DISTINCT e.atlas_organism_part
-        FROM Expression as e
-        INNER JOIN Transcripts t
-        ON e.ensembl_transcript_id = t.ensembl_transcript_id
-        WHERE t.ensembl_transcript_id IN ({}) AND e.atlas_organism_part IS NOT NULL
-    """.format(",".join("?" for _ in list_of_transcript_ids)), tuple(list_of_transcript_ids))
-    rows3 = cursor.fetchall()
-    conn.close()
-    return row, row2, rows3 # would need to name them otherwise
 
-def update_gene(gene_id, form_data):
+    gene = dict(row)
+    transcripts = json.loads(gene.pop("transcripts_json"))
+    parts = [{"Atlas_Organism_Part": part} for part in json.loads(gene.pop("parts_json"))]
+    return gene, transcripts, parts
+
+def update_gene_from_form(gene_id, form_data):
     """
-    Updates gene information in the database for a given gene ID using provided form data.
+    Updates gene information in the database for a given gene ID using provided form data
+    (edit page of tp4). The associated gene name is not part of the form and is kept.
     Args:
         gene_id (str): The Ensembl gene ID to update.
         form_data (dict): A dictionary containing the updated gene information.
@@ -109,23 +371,17 @@ def update_gene(gene_id, form_data):
     """
     conn = get_db_connection()
     cursor = conn.cursor()
-    cursor.execute("""
-        UPDATE Genes
-        SET Chromosome_Name = ?,
-            Band = ?,
-            Strand = ?,
-            Gene_Start = ?,
-            Gene_End = ?
-        WHERE ensembl_gene_id = ?
-    """, (
-        form_data['chromosome_name'],
-        form_data['band'],
-        form_data['strand'],
-        form_data['gene-start'],
-        form_data['gene-end'],
-        gene_id))
-    conn.commit()
-    conn.close()
+    try:
+        cursor.execute(_SQL_UPDATE_GENE_FROM_FORM, (
+            form_data['chromosome_name'],
+            form_data['band'],
+            form_data['strand'],
+            form_data['gene-start'],
+            form_data['gene-end'],
+            gene_id))
+        conn.commit()
+    finally:
+        _invalidate_caches()
     return
 
 def from_list_to_dict(keys, values):
@@ -138,7 +394,7 @@ def from_list_to_dict(keys, values):
     Returns:
         dict: A dictionary mapping keys to values.
     """
-    return {key: value for key, value in zip(keys, values)}
+    return dict(zip(keys, values))
 
 def fetch_transcript_by_id(transcript_id):
     """
@@ -148,25 +404,17 @@ def fetch_transcript_by_id(transcript_id):
     Returns:
         tuple: A tuple containing:
             - sqlite3.Row: The transcript information.
-            - list of sqlite3.Row: A list of expression data associated with the transcript.
+            - list of sqlite3.Row: A list of the atlas organism parts where the transcript
+                is expressed.
     """
     conn = get_db_connection()
     cursor = conn.cursor()
-    cursor.execute("""
-        SELECT *
-    FROM Transcripts as t
-    WHERE t.ensembl_transcript_id = ?
-                   """, (transcript_id,))
+    cursor.execute(_SQL_FETCH_TRANSCRIPT, (transcript_id,))
     row1 = cursor.fetchone() # only one transcript per id
-    cursor.execute("""
-        SELECT *
-    FROM Expression as e return an empty SVG
-    WHERE e.ensembl_transcript_id = ?
-                        """, (transcript_id,))
+    cursor.execute(_SQL_FETCH_TRANSCRIPT_EXPRESSION, (transcript_id,))
     row2 = cursor.fetchall() # could be multiple expression entries per transcript
-    conn.close()
-    print(row1.keys())
-    print(row2[1].keys())
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug("fetch_transcript_by_id(%r): %d expression rows", transcript_id, len(row2))
     return row1, row2 # could name them otherwise
 
 def plot_gene_parts(gene_id):
@@ -175,76 +423,59 @@ def plot_gene_parts(gene_id):
     Args:
         gene_id (str): The Ensembl gene ID to plot expression data for.
     Returns:
-        dict: A dictionary mapping atlas organism parts to their respective transcript counts.
-    """
-    _, _, expression_info = fetch_gene_by_id(gene_id) # we only need expression_info (prevent redundant functions)
-    list_of_expression_info = [
-        expr['atlas_organism_part'] for expr in expression_info
-        if expr['atlas_organism_part'] is not None # filter could be done in SQL query
-    ]
-    print(list_of_expression_info)
+        dict: A dictionary mapping atlas organism parts to their respective transcript counts
+            (empty if the gene does not exist or is not expressed anywhere).
+    """
     conn = get_db_connection()
     cursor = conn.cursor()
-    if not list_of_expression_info:
-        conn.close()
-        return {}
-    placeholders = ",".join("?" for _ in list_of_expression_info)
-    sql = f"""
-        SELECT e.atlas_organism_part, COUNT(t.ensembl_transcript_id) as count
-        FROM Expression e
-        INNER JOIN Transcripts t
-        ON e.ensembl_transcript_id = t.ensembl_transcript_id
-        WHERE atlas_organism_part IN ({placeholders})
-        AND t.ensembl_gene_id = ?
-        GROUP BY e.atlas_organism_part
-        ORDER BY count DESC
-    """
-    params = tuple(list_of_expression_info) + (gene_id,)
-    cursor.execute(sql, params)
+    # Single aggregate query: the join on the gene ID already restricts to the gene's parts
+    cursor.execute(_SQL_PLOT_GENE_PARTS, (gene_id,))
     rows = cursor.fetchall()
-    conn.close()
     rows = {row['atlas_organism_part']: row['count'] for row in rows}
     return rows
 
-def fetch_collection_of_genes(offset=0):
+def fetch_collection_of_genes(after_id=None):
     """
-    Fetches a collection of distinct genes and their associated names with pagination.
+    Fetches a page of genes and their associated names with keyset pagination:
+    the page starts right after the given gene ID, so SQLite seeks into the index
+    instead of scanning and discarding the rows of the previous pages.
     Args:
-        offset (int): The offset for pagination.
+        after_id (str, optional): The Ensembl gene ID of the last row of the previous
+            page. Defaults to None (first page).
     Returns:
-        list of sqlite3.Row: A list of rows containing distinct gene information and their
-            associated names.
+        generator of sqlite3.Row: At most COLLECTION_PAGE_SIZE rows containing
+            gene information and their associated names, streamed from the cursor.
+            Gene IDs are unique (see the idx_genes_gid index), so no DISTINCT is needed.
     """
     conn = get_db_connection()
     cursor = conn.cursor()
-    cursor.execute("""
-        SELECT DISTINCT *
-    FROM Genes as g
-    ORDER BY g.ensembl_gene_id
-    LIMIT 100 OFFSET ?
-                   """, (offset,))
-    rows = cursor.fetchall()
-    conn.close()
-    return rows
+    cursor.execute(_SQL_FETCH_GENES_PAGE, (after_id or "", COLLECTION_PAGE_SIZE))
+    return _iter_rows(cursor)
 
 def check_gene_exists(ensembl_gene_id):
     """
     Checks if a gene with the given Ensembl gene ID exists in the database.
+    Results are memoized in _GENE_EXISTS_CACHE; helpers adding or removing genes
+    clear it, and a result read across such a write is not stored.
     Args:
         ensembl_gene_id (str): The Ensembl gene ID to check.
     Returns:
         bool: True if the gene exists, False otherwise.
     """
+    exists = _GENE_EXISTS_CACHE.get(ensembl_gene_id)
+    if exists is not None:
+        return exists
+    generation = _cache_generation
     conn = get_db_connection()
     cursor = conn.cursor()
-    cursor.execute("""
-        SELECT 1
-    FROM Genes
-    WHERE ensembl_gene_id = ?
-                   """, (ensembl_gene_id,))
-    row = cursor.fetchone()
-    conn.close()
-    return row is not None
+    cursor.execute(_SQL_CHECK_GENE, (ensembl_gene_id,))
+    exists = cursor.fetchone() is not None
+    with _CACHE_LOCK:
+        if generation == _cache_generation: # no write since the query started
+            if len(_GENE_EXISTS_CACHE) >= _GENE_EXISTS_CACHE_SIZE:
+                _GENE_EXISTS_CACHE.clear()
+            _GENE_EXISTS_CACHE[ensembl_gene_id] = exists
+    return exists
 
 def insert_new_gene(ensembl_gene_id, chromosome_name, band, gene_start, gene_end, strand=None, associated_gene_name=None):
     """
@@ -264,62 +495,64 @@ def insert_new_gene(ensembl_gene_id, chromosome_name, band, gene_start, gene_end
     """
     conn = get_db_connection()
     cursor = conn.cursor()
-    cursor.execute("""
-        INSERT INTO Genes (ensembl_gene_id, chromosome_name, band, gene_start, gene_end, strand, associated_gene_name)
-    VALUES (?, ?, ?, ?, ?, ?, ?)
-                   """, (
-                       ensembl_gene_id,
-                       chromosome_name,
-                       band,
-                       gene_start,
-                       gene_end,
-                       strand,
-                       associated_gene_name
-                   ))
-    conn.commit()
-    conn.close()
+    try:
+        cursor.execute(_SQL_INSERT_GENE, (
+            ensembl_gene_id,
+            chromosome_name,
+            band,
+            gene_start,
+            gene_end,
+            strand,
+            associated_gene_name
+        ))
+        conn.commit()
+    finally:
+        _invalidate_caches()
     return
 
 # Pour aller plus loin
 
-def insert_bulk_new_genes(genes_data):
+@contextlib.contextmanager
+def bulk_transaction():
+    """
+    Context manager grouping several writes of the calling thread into one
+    transaction, hence a single commit (and fsync) for the whole block.
+    BEGIN IMMEDIATE takes the write lock upfront; the transaction is committed
+    when the block exits normally and rolled back if it raises. The block may
+    also roll back itself through the yielded connection.
+    Yields:
+        sqlite3.Connection: The connection the transaction is open on.
+    """
+    conn = get_db_connection()
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        yield conn
+    except:
+        conn.rollback()
+        raise
+    else:
+        conn.commit() # no-op if the block already rolled back
+    finally:
+        _invalidate_caches()
+
+def insert_bulk_new_genes(gene_tuples):
     """
-    Inserts multiple new genes into the database in bulk.
+    Inserts multiple new genes into the database in bulk, within the transaction
+    opened by bulk_transaction() (this function does not commit).
+    IDs that already exist are not checked beforehand: the insert skips them
+    (ON CONFLICT DO NOTHING), so the caller compares the returned count with the
+    number of genes and rolls back on a conflict.
     Args:
-        genes_data (list of dict): A list of dictionaries, each containing gene data with required fields:
-            - "Ensemble_Gene_ID" (str)
-            - "Chromosome_Name" (str)
-            - "Band" (str)
-            - "Gene_Start" (int)
-            - "Gene_End" (int)
-            Optional fields:
-            - "Strand" (int)
-            - "Associated_Gene_Name" (str)
+        gene_tuples (list of tuple): One tuple per gene, bound as is to the insert:
+            (ensembl_gene_id, chromosome_name, band, gene_start, gene_end, strand,
+            associated_gene_name), the last two being possibly None.
     Returns:
-        None
-    Raises:
-        sqlite3.IntegrityError: If any insertion violates database constraints.
+        int: The number of genes actually inserted.
     """
     conn = get_db_connection()
     cursor = conn.cursor()
-    gene_tuples = []
-    for gene in genes_data:
-        gene_tuples.append((
-            gene["Ensemble_Gene_ID"],
-            gene["Chromosome_Name"],
-            gene["Band"],
-            gene["Gene_Start"],
-            gene["Gene_End"],
-            gene.get("Strand"),
-            gene.get("Associated_Gene_Name")
-        ))
-    cursor.executemany("""
-        INSERT INTO Genes (ensembl_gene_id, chromosome_name, band, gene_start, gene_end, strand, associated_gene_name)
-    VALUES (?, ?, ?, ?, ?, ?, ?)
-                   """, gene_tuples)
-    conn.commit()
-    conn.close()
-    return
+    cursor.executemany(_SQL_INSERT_GENE_IF_NEW, gene_tuples)
+    return cursor.rowcount
 
 # End pour aller plus loin
 
@@ -333,30 +566,36 @@ def delete_gene(ensembl_gene_id):
     """
     conn = get_db_connection()
     cursor = conn.cursor()
-    cursor.execute("""
-        DELETE FROM Genes
-    WHERE ensembl_gene_id = ?
-                   """, (ensembl_gene_id,))
-    conn.commit()
-    conn.close()
+    try:
+        cursor.execute(_SQL_DELETE_GENE, (ensembl_gene_id,))
+        conn.commit()
+    finally:
+        _invalidate_caches()
     return
 
-def update_gene(ensembl_gene_id, chromosome_name, band, gene_start, gene_end, strand=None, associated_gene_name=None):
+def upsert_gene(ensembl_gene_id, chromosome_name, band, gene_start, gene_end, strand=None, associated_gene_name=None):
+    """
+    Creates a gene, or replaces the information of an existing one, in a single
+    statement (Web API, see tp7.edition_gene).
+    Args:
+        ensembl_gene_id (str): The Ensembl gene ID of the gene to create or update.
+        chromosome_name (str): The chromosome name.
+        band (str): The band.
+        gene_start (int): The start position of the gene.
+        gene_end (int): The end position of the gene.
+        strand (int, optional): The strand. Defaults to None.
+        associated_gene_name (str, optional): The associated gene name. Defaults to None.
+    Returns:
+        None
+    """
     conn = get_db_connection()
     cur = conn.cursor()
-    cur.execute(
-        """
-        UPDATE Genes
-        SET Chromosome_Name = ?,
-            Band = ?,
-            Gene_Start = ?,
-            Gene_End = ?,
-            Strand = ?,
-            Associated_Gene_Name = ?
-        WHERE ensembl_gene_id = ?
-        """,
-        (chromosome_name, band, gene_start, gene_end, strand, associated_gene_name, ensembl_gene_id)
-    )
-    conn.commit()
-    conn.close()
+    try:
+        cur.execute(
+            _SQL_UPSERT_GENE,
+            (ensembl_gene_id, chromosome_name, band, gene_start, gene_end, strand, associated_gene_name)
+        )
+        conn.commit()
+    finally:
+        _invalidate_caches()
     return
\ No newline at end of file
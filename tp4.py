@@ -1,18 +1,317 @@
 import flask
+import flask_caching
+import flask_compress
+import jinja2
+import orjson
 import sqlite3
 import sql_requests
-from matplotlib.figure import Figure
-import matplotlib.pyplot as plt
 import tp7 as api # which contains additional API functions
 import math
+import numpy as np
+import threading
+import html
+import hashlib
+import functools
+import time
+import os
+import werkzeug.exceptions
+import werkzeug.security
+import urllib.parse
 
 import io
 
 
 app = flask.Flask(__name__)
 
+# Templates are not edited while the server runs: keep every compiled template
+# in memory without checking the files for changes, and store the compiled
+# bytecode on disk (in the system temp dir) so that a restarted worker does not
+# parse them again. Must be set before app.jinja_env is first used.
+app.config["TEMPLATES_AUTO_RELOAD"] = False
+app.jinja_options = {
+    **app.jinja_options,
+    "auto_reload": False,
+    "cache_size": 1000,
+    "bytecode_cache": jinja2.FileSystemBytecodeCache(),
+}
+
+# Template of gene_parts_svg, compiled once and rendered directly, without
+# going through the template loader on each request.
+_PARTS_SVG_TEMPLATE = app.jinja_env.get_template('gene_parts.svg.j2')
+
+
+class OrjsonProvider(flask.json.provider.DefaultJSONProvider):
+    """
+    JSON provider of the app backed by orjson instead of the stdlib json module.
+    Output keeps Flask's defaults (sorted keys, compact unless in debug mode, same
+    fallback for dates, decimals and dataclasses), but non-ASCII characters are
+    written as UTF-8 instead of being escaped.
+    """
+
+    def _dumps_bytes(self, obj, pretty=False):
+        # dates and dataclasses go through self.default, as with Flask's provider
+        option = (orjson.OPT_SORT_KEYS | orjson.OPT_NON_STR_KEYS
+                  | orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_PASSTHROUGH_DATACLASS)
+        if pretty:
+            option |= orjson.OPT_INDENT_2
+        return orjson.dumps(obj, default=self.default, option=option)
+
+    def dumps(self, obj, **kwargs):
+        return self._dumps_bytes(obj, pretty=bool(kwargs.get("indent"))).decode()
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        pretty = (self.compact is None and self._app.debug) or self.compact is False
+        # bytes straight from orjson, no intermediate str
+        return self._app.response_class(self._dumps_bytes(obj, pretty) + b"\n", mimetype=self.mimetype)
+
+
+app.json = OrjsonProvider(app) # used by flask.jsonify and request.get_json
+
+# Responses of the read-only routes, keyed by path and query string.
+# SimpleCache is per process; use e.g. RedisCache when running several workers.
+cache = flask_caching.Cache(app, config={
+    "CACHE_TYPE": "SimpleCache",
+    "CACHE_DEFAULT_TIMEOUT": 300,
+})
+
+# Compress text responses (pages, SVG, JSON) with Brotli, or gzip for older clients.
+# Streamed responses (stream_template pages, files sent by disk_cached) have their
+# own list, which has no gzip by default.
+# Flask-Compress appends the algorithm to the ETag (see conditional_get).
+app.config.update(
+    COMPRESS_ALGORITHM=["br", "gzip"],
+    COMPRESS_ALGORITHM_STREAMING=["br", "gzip"],
+    COMPRESS_MIN_SIZE=500,
+    COMPRESS_MIMETYPES=["application/json", "image/svg+xml", "text/html"],
+)
+flask_compress.Compress(app)
+
+with app.app_context():
+    sql_requests.create_indexes() # no-op once the indexes exist
+
+# One figure for gene_parts_plot, cleared after each drawing instead of
+# creating (and closing) a new pyplot figure per request. Created, along with
+# the Matplotlib import, when the first PNG is drawn (see _parts_figure).
+_PARTS_FIG = None
+_PARTS_FIG_LOCK = threading.Lock() # the figure is shared by all request threads
+
+# Version of the data served by this process, part of every ETag. It starts from
+# the process start time (so ETags from a previous run never match) and is
+# bumped by invalidate_cache() on each write.
+_data_version = time.time_ns()
+
+# Rendered images written by disk_cached, emptied by invalidate_cache(); the files
+# are plain static files, so a front server can also serve /static/cache/ itself.
+_IMAGE_CACHE_DIR = os.path.join(app.static_folder, "cache")
+
+# Characters left unquoted in a URL path segment, as in werkzeug's default converter
+_URL_PATH_SAFE = "!$&'()*+,/:;=@"
+
+# Error payloads of the API write routes, by response code of tp7.edition_gene;
+# any other code is reported as an internal error.
+_API_ERRORS = {
+    400: ("Bad Request", 400),
+    404: ("Not Found - Gene ID does not exist", 404),
+    409: ("Conflict - Gene ID already exists", 409),
+}
+_API_INTERNAL_ERROR = ("Internal Server Error", 500)
+
+# Key of the success payload of api_edit_gene_by_id, by response code
+_API_PUT_RESULTS = {200: "edited", 201: "created"}
+
+
+def _parts_figure():
+    """
+    Return the figure shared by the gene_parts_plot calls, importing Matplotlib
+    and creating it on first use: the import is slow and memory hungry, and
+    only this route needs it. Callers must hold _PARTS_FIG_LOCK.
+    No parameters.
+    Returns:
+        matplotlib.figure.Figure: The shared figure, attached to an Agg canvas.
+    """
+    global _PARTS_FIG
+    if _PARTS_FIG is None:
+        import matplotlib
+        matplotlib.use('Agg')  # Use a non-interactive backend
+        from matplotlib.figure import Figure
+        from matplotlib.backends.backend_agg import FigureCanvasAgg
+        _PARTS_FIG = Figure(figsize=(6, 5))
+        # Fixed margins, set once, instead of tight_layout()/bbox_inches='tight' that
+        # measure the text on every drawing; the bottom one fits the longest part
+        # name (28 characters) written vertically in 8 pt.
+        _PARTS_FIG.subplots_adjust(left=0.12, right=0.98, top=0.93, bottom=0.42)
+        FigureCanvasAgg(_PARTS_FIG)
+    return _PARTS_FIG
+
+
+@app.teardown_appcontext
+def release_db(exc):
+    """
+    Release the SQLite connection used by the current app context.
+    sql_requests keeps one persistent connection per thread, reused by every
+    request served by that thread; it is not closed here, only rolled back if
+    a transaction was left open.
+    Parameters:
+        exc (BaseException or None): The exception that ended the context, if any.
+    Returns:
+        None.
+    """
+    sql_requests.release_db_connection()
+
+
+def invalidate_cache():
+    """
+    Drop every cached response after a write to the database.
+    A single gene edit can change its own pages as well as any page of the
+    gene collection, and writes are rare compared to reads, so the whole
+    cache is cleared rather than tracking individual keys.
+    No parameters.
+    Returns:
+        None.
+    """
+    global _data_version
+    _data_version += 1 # first, so that requests starting now use the new cache keys
+    cache.clear()
+    if os.path.isdir(_IMAGE_CACHE_DIR):
+        for entry in os.scandir(_IMAGE_CACHE_DIR):
+            if entry.name.endswith(".tmp"):
+                continue # still being written by disk_cached, which checks the version itself
+            try:
+                os.unlink(entry.path)
+            except FileNotFoundError: # already removed by another worker
+                pass
+
+
+def _cache_key_prefix():
+    """
+    Key prefix of the responses cached by cached_response: the request path and
+    the data version seen when the request started, recorded in flask.g for
+    _same_data_version.
+    No parameters.
+    Returns:
+        str: The key prefix.
+    """
+    flask.g.cache_data_version = _data_version
+    return f"view/{_data_version}{flask.request.path}"
+
+
+def _same_data_version(resp):
+    """
+    Response filter of cached_response: only keep a response if no write
+    happened while the view was running, as the body may predate it.
+    Parameters:
+        resp: The value returned by the view.
+    Returns:
+        bool: True if the response can be cached.
+    """
+    return flask.g.get("cache_data_version") == _data_version
+
+
+def cached_response(view):
+    """
+    Decorator caching the response of a read-only route (path and query string).
+    The cache keys include the data version, so a response computed across a
+    write is never served after it: it is not stored, and even if it is stored
+    right after the write (between the check and the set) it lands under the
+    previous version's key, which no request looks up any more.
+    Parameters:
+        view (callable): The view function to wrap.
+    Returns:
+        callable: The wrapped view function.
+    """
+    return cache.cached(query_string=True, key_prefix=_cache_key_prefix,
+                        response_filter=_same_data_version)(view)
+
+
+def disk_cached(filename, mimetype):
+    """
+    Decorator caching the body of a gene image route as a file in _IMAGE_CACHE_DIR.
+    On a miss the view is called and its body written atomically (temporary
+    file, then os.replace); every hit, including the first one, is then sent
+    from that file with flask.send_from_directory (sendfile, Range and
+    Last-Modified support) without running the view.
+    Parameters:
+        filename (str): Name of the cached file, formatted with the URL
+            parameters of the route (e.g. "{gene_id}_parts.png"). Only the
+            images of existing genes are written.
+        mimetype (str): The mimetype of the response.
+    Returns:
+        callable: The decorator.
+    """
+    def decorator(view):
+        @functools.wraps(view)
+        def wrapper(**kwargs):
+            name = filename.format(**kwargs)
+            path = werkzeug.security.safe_join(_IMAGE_CACHE_DIR, name)
+            if path is None:
+                flask.abort(404)
+            if os.path.exists(path):
+                try:
+                    return flask.send_from_directory(_IMAGE_CACHE_DIR, name, mimetype=mimetype, conditional=True)
+                except werkzeug.exceptions.NotFound:
+                    pass # removed by a write in the meantime: draw it again
+            version = _data_version
+            resp = flask.make_response(view(**kwargs))
+            if resp.status_code != 200 or not sql_requests.check_gene_exists(kwargs["gene_id"]):
+                return resp # unknown IDs are not written to disk
+            os.makedirs(_IMAGE_CACHE_DIR, exist_ok=True)
+            tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            try:
+                with open(tmp_path, "wb") as f:
+                    f.write(resp.get_data())
+                os.replace(tmp_path, path)
+            except FileNotFoundError: # cache directory emptied by another worker
+                return resp
+            if version != _data_version: # data changed while drawing: do not keep it
+                try:
+                    os.unlink(path)
+                except FileNotFoundError:
+                    pass
+                return resp
+            try:
+                return flask.send_from_directory(_IMAGE_CACHE_DIR, name, mimetype=mimetype, conditional=True)
+            except werkzeug.exceptions.NotFound: # removed by a write since it was written
+                return resp
+        return wrapper
+    return decorator
+
+
+def conditional_get(view):
+    """
+    Decorator adding ETag-based conditional GET to a read-only route.
+    The ETag is derived from the request path (with its query string) and the
+    current data version. If the client already holds it (If-None-Match), a
+    304 Not Modified is returned without calling the view at all; otherwise
+    the ETag is attached to the successful response. Clients must revalidate
+    each time (no-cache), so an edit is visible on the next load.
+    Parameters:
+        view (callable): The view function to wrap.
+    Returns:
+        callable: The wrapped view function.
+    """
+    @functools.wraps(view)
+    def wrapper(*args, **kwargs):
+        etag = hashlib.blake2b(f"{flask.request.full_path}:{_data_version}".encode(),
+                               digest_size=8).hexdigest()
+        # compressed responses were sent with the ETag "<etag>:<algorithm>"
+        if any(tag.split(":", 1)[0] == etag for tag in flask.request.if_none_match.as_set()):
+            resp = flask.Response(status=304)
+        else:
+            resp = flask.make_response(view(*args, **kwargs))
+            if resp.status_code != 200:
+                return resp # no validator on errors
+        resp.set_etag(etag)
+        resp.cache_control.no_cache = True
+        return resp
+    return wrapper
+
 
 @app.route('/')
+@cached_response
 def index():
     """
     Render the application's index page.
@@ -40,14 +339,15 @@ def index():
 def genes_by_part(part):
     """
     Render a page showing genes associated with a specific part.
-    Fetches data via sql_requests.fetch_genes_by_part(part) and renders the
+    Fetches data via sql_requests.fetch_genes_by_part(part) and streams the
     'parts_genes.html' template with the retrieved rows available in the template
     context under the name "rows", and the part under the name "part".
+    The page is sent while rows are still being read from the database.
     Parameters:
         part (str): The part identifier used to filter genes.
     Returns:
-        A Flask response object (the rendered template) as returned by
-        flask.render_template('parts_genes.html', part=part, rows=rows).
+        A streamed Flask response object built from
+        flask.stream_template('parts_genes.html', part=part, rows=rows).
     Raises:
         Any exceptions raised by sql_requests.fetch_genes_by_part(part) (for
         example database errors) or by flask.render_template() (for example
@@ -57,11 +357,13 @@ def genes_by_part(part):
     """
 
     rows = sql_requests.fetch_genes_by_part(part)
-    return flask.render_template('parts_genes.html', part=part, rows=rows)
+    return flask.Response(flask.stream_template('parts_genes.html', part=part, rows=rows))
 
 
 
 @app.route('/genes/<gene_id>')
+@conditional_get
+@cached_response
 def gene_by_id(gene_id):
     """
     Render a page showing detailed information about a specific gene.
@@ -90,11 +392,11 @@ def gene_by_id(gene_id):
 def edit_gene(gene_id):
     """
     Handle editing of a specific gene's information.
-    For GET requests, fetches data via sql_requests.fetch_gene_by_id(gene_id)
+    For GET requests, fetches data via sql_requests.fetch_gene_row_only(gene_id)
     and renders the 'edit_gene.html' template with the retrieved row available
     in the template context under the name "row".
     For POST requests, updates the gene information using
-    sql_requests.update_gene(gene_id, form_data) where form_data is obtained
+    sql_requests.update_gene_from_form(gene_id, form_data) where form_data is obtained
     from the submitted form, and then redirects to the gene's detail page.
     Parameters:
         gene_id (str): The gene identifier used to fetch and update information.
@@ -104,8 +406,8 @@ def edit_gene(gene_id):
         For POST requests: A Flask redirect response to the gene's detail page
         as returned by flask.redirect(f'/genes/{gene_id}').
     Raises:
-        Any exceptions raised by sql_requests.fetch_gene_by_id(gene_id) or
-        sql_requests.update_gene(gene_id, form_data) (for example database
+        Any exceptions raised by sql_requests.fetch_gene_row_only(gene_id) or
+        sql_requests.update_gene_from_form(gene_id, form_data) (for example database
         errors) or by flask.render_template() (for example template not found)
         will propagate to the caller.
     Side effects:
@@ -117,15 +419,17 @@ def edit_gene(gene_id):
 
     if flask.request.method == 'POST':
         form_data = flask.request.form
-        sql_requests.update_gene(gene_id, form_data)
+        sql_requests.update_gene_from_form(gene_id, form_data)
+        invalidate_cache()
         return flask.redirect(f'/genes/{gene_id}')
     else:
-        row, row2, row3 = sql_requests.fetch_gene_by_id(gene_id)
+        row = sql_requests.fetch_gene_row_only(gene_id) # the form only needs the gene itself
         return flask.render_template('edit_gene.html', row=row)
 
 
 
 @app.route('/transcripts/<transcript_id>')
+@cached_response
 def transcript_by_id(transcript_id):
     """
     Render a page showing detailed information about a specific transcript.
@@ -167,11 +471,14 @@ def transcript_by_id(transcript_id):
 #     plt.savefig(png_path)
 #     plt.close(fig)
 #     return flask.send_file(png_path, mimetype='image/png')
+@conditional_get
+@disk_cached("{gene_id}_parts.png", "image/png")
 def gene_parts_plot(gene_id):
     """
     Generate and return a PNG plot showing the distribution of parts for a specific gene.
-    Fetches data via sql_requests.plot_gene_parts(gene_id), creates a histogram
-    using Matplotlib, and returns the plot as a PNG image.
+    Fetches data via sql_requests.plot_gene_parts(gene_id), draws a bar chart
+    on the shared Matplotlib figure (without pyplot), and returns the plot as a
+    PNG image.
     Parameters:
         gene_id (str): The gene identifier used to fetch parts distribution data.
     Returns:
@@ -186,30 +493,122 @@ def gene_parts_plot(gene_id):
     """
 
     data_for_png = sql_requests.plot_gene_parts(gene_id)
-    fig, ax = plt.subplots()
     keys = list(data_for_png.keys())
     values = list(data_for_png.values())
-    if keys:
-        ax.hist(keys, weights=values, bins=len(keys), align='mid')
-        ax.set_xlabel('Parts')
-        ax.set_ylabel('Counts')
-        ax.set_title(f'Gene {gene_id} parts distribution')
-        plt.xticks(rotation=90)
-    plt.tight_layout()
     buf = io.BytesIO()
-    plt.savefig(buf, format='png', bbox_inches='tight')
-    plt.close(fig)
-    buf.seek(0)
-    return flask.send_file(buf, mimetype='image/png') # All parts have the same count
+    with _PARTS_FIG_LOCK:
+        fig = _parts_figure()
+        try:
+            if keys:
+                ax = fig.add_subplot(111)
+                ax.bar(range(len(keys)), values)
+                ax.set_xticks(range(len(keys)))
+                ax.set_xticklabels(keys, rotation=90, fontsize=8)
+                ax.set_xlabel('Parts')
+                ax.set_ylabel('Counts')
+                ax.set_title(f'Gene {gene_id} parts distribution')
+            fig.savefig(buf, format='png')
+        finally:
+            fig.clf() # ready for the next request
+    # bytes body: sent as is, with its Content-Length, without send_file re-reading the buffer
+    return flask.Response(buf.getvalue(), mimetype='image/png')
+
+
+
+@app.route('/genes/<gene_id>/parts.svg')
+@conditional_get
+@cached_response
+def gene_parts_svg(gene_id):
+    """
+    Generate and return an SVG bar chart showing the distribution of parts for a specific gene.
+    Same data as gene_parts_plot, but the chart is written directly as SVG with a
+    Jinja2 template instead of being rasterised by Matplotlib; each bar links to
+    the page of genes expressed in that part.
+    Parameters:
+        gene_id (str): The gene identifier used to fetch parts distribution data.
+    Returns:
+        A Flask response object containing the SVG image, with mimetype
+        'image/svg+xml'.
+    Raises:
+        Any exceptions raised by sql_requests.plot_gene_parts(gene_id) (for
+        example database errors) or by the template rendering will propagate
+        to the caller.
+    Side effects:
+        Performs a database query to obtain the data used to generate the chart.
+    """
+
+    data_for_svg = sql_requests.plot_gene_parts(gene_id) # already sorted by count, descending
+
+    # Horizontal bars: part names on the left, bar lengths scaled to the largest count
+    width_px = 800
+    label_px = 220
+    bar_max  = width_px - label_px - 60 # room left for the count label
+    max_count = max(data_for_svg.values(), default=1)
+    bars = []
+    for i, (part, count) in enumerate(data_for_svg.items()):
+        bars.append({
+            "part":  part,
+            "count": count,
+            "y":     30 + 22*i,
+            "w":     max(1, count * bar_max // max_count) # min 1 px
+        })
+    height = 22 * len(bars) + 40
+
+    svg = _PARTS_SVG_TEMPLATE.render(width=width_px, height=height, label_w=label_px,
+                                     bars=bars, gene_id=gene_id)
+    return flask.Response(svg, mimetype="image/svg+xml")
 
 
 
+def _render_transcripts_svg(width, height, ids, xs, ys, ws, colors=(), colors_text=()):
+    """
+    Build the SVG document of gene_transcripts_svg as a string.
+    The document is a flat list of rectangles, so it is assembled directly with
+    str.join() instead of going through a Jinja2 template.
+    Parameters:
+        width (int): Width of the SVG, in pixels.
+        height (int): Height of the SVG, in pixels.
+        ids (sequence of str): Transcript IDs, one per rectangle.
+        xs, ys, ws (sequences of int): Position and width of each rectangle,
+            in the same order as ids.
+        colors (sequence of str): Fill colors cycled over the rectangles.
+        colors_text (sequence of str): Fill colors cycled over the labels.
+    Returns:
+        str: The SVG document.
+    """
+    parts = [
+        f'<svg xmlns="http://www.w3.org/2000/svg" width="{width}" height="{height}" '
+        f'viewBox="0 0 {width} {height}">\n'
+        '<style>\n'
+        '.gene_id_label{ opacity: 0; transition: all 0.3s ease; }\n'
+        '.rectangle:hover + .gene_id_label{ opacity: 1; }\n'
+        '.gene_id_label:hover{ opacity: 1; }\n'
+    ]
+    parts.extend(f'a:nth-of-type({len(colors)}n + {i}) > rect {{ fill: {color}; }}\n'
+                 for i, color in enumerate(colors, start=1))
+    parts.extend(f'a:nth-of-type({len(colors_text)}n + {i}) > text {{ fill: {color}; }}\n'
+                 for i, color in enumerate(colors_text, start=1))
+    parts.append('</style>\n')
+    for id_tr, x, y, w in zip(ids, xs, ys, ws):
+        id_tr = html.escape(id_tr)
+        parts.append(
+            f'<a href="/transcripts/{id_tr}" target="_blank">'
+            f'<rect x="{x}" y="{y}" width="{w}" height="20" fill="#dde5ff" class="rectangle"/>'
+            f'<text x="{x + 4}" y="{y + 15}" font-size="12" fill="#0078f3" class="gene_id_label">{id_tr}</text>'
+            '</a>\n'
+        )
+    parts.append('</svg>')
+    return ''.join(parts)
+
+
 @app.route('/genes/<gene_id>/transcripts.svg')
+@conditional_get
+@disk_cached("{gene_id}_transcripts.svg", "image/svg+xml")
 def gene_transcripts_svg(gene_id):
     """
     Generate and return an SVG representation of the transcripts for a specific gene.
     Fetches data via sql_requests.fetch_gene_by_id(gene_id), processes the
-    transcript coordinates, and renders an SVG using a Jinja2 template.
+    transcript coordinates, and builds the SVG with _render_transcripts_svg().
     Parameters:
         gene_id (str): The gene identifier used to fetch transcript data.
     Returns:
@@ -217,8 +616,7 @@ def gene_transcripts_svg(gene_id):
         'image/svg+xml'.
     Raises:
         Any exceptions raised by sql_requests.fetch_gene_by_id(gene_id) (for
-        example database errors) or by flask.render_template() (for example
-        template not found) will propagate to the caller.
+        example database errors) will propagate to the caller.
     Side effects:
         Performs a database query to obtain the transcript data used to generate
         the SVG.
@@ -226,45 +624,41 @@ def gene_transcripts_svg(gene_id):
 
     _, row2, _ = sql_requests.fetch_gene_by_id(gene_id) # we only need transcripts (row2)
 
-    coordinates = []
-    for i, tr in enumerate(row2 or []):
-        coordinates.append({
-            "id_tr": tr["Ensembl_Transcript_ID"],
-            "start": int(tr["Transcript_Start"]),
-            "end":   int(tr["Transcript_End"]),
-            "y":     30*i + 20 
-        }) 
-
-
-    if not coordinates: # if there are no transcripts
-        svg = flask.render_template('gene_transcripts.svg.j2',
-                              width=800, height=50, coordinates=[])
+    if not row2: # if there are no transcripts (or no gene)
+        svg = _render_transcripts_svg(800, 50, [], [], [], [])
         return flask.Response(svg, mimetype="image/svg+xml")
 
+    # One parallel list per field (no dict per transcript), filled in a single pass;
+    # bounds then become arrays, scaled all at once instead of transcript by transcript
+    ids, starts, ends = [], [], []
+    for tr in row2:
+        ids.append(tr["Ensembl_Transcript_ID"])
+        starts.append(int(tr["Transcript_Start"]))
+        ends.append(int(tr["Transcript_End"]))
+    starts = np.array(starts, dtype=np.int64)
+    ends   = np.array(ends, dtype=np.int64)
 
     # Compute scaling factors and positions to fit within 800px width
     width_px  = 800
     margin_px = 20
     inner_w   = width_px - 2*margin_px
-    min_start = min(c["start"] for c in coordinates)
-    max_end   = max(c["end"]   for c in coordinates)
-    span      = max(1, max_end - min_start)
+    min_start = int(starts.min())
+    span      = max(1, int(ends.max()) - min_start)
     scale     = inner_w / span
 
-    # Update coordinates with scaled positions and widths
-    for c in coordinates:
-        c["x"] = margin_px + int((c["start"] - min_start) * scale)
-        c["w"] = max(1, int((c["end"] - c["start"]) * scale))  # min 1 px
+    xs = margin_px + ((starts - min_start) * scale).astype(np.int64)
+    ws = np.maximum(1, ((ends - starts) * scale).astype(np.int64)) # min 1 px
+
+    ys = range(20, 30*len(ids) + 20, 30)
 
     # Compute SVG height
-    height = 30 * len(coordinates) + 50
+    height = 30 * len(ids) + 50
 
     # Define colors (pour aller plus loin)
     colors = ['#dde5ff', '#88fdaa', '#ffded9', '#ffdddd']
     colors_text = ['#0063cb', '#18753c', '#b34000', '#ce0500']
 
-    svg = flask.render_template('gene_transcripts.svg.j2',
-                          width=width_px, height=height, coordinates=coordinates, colors=colors, colors_text=colors_text)
+    svg = _render_transcripts_svg(width_px, height, ids, xs.tolist(), ys, ws.tolist(), colors, colors_text)
     return flask.Response(svg, mimetype="image/svg+xml")
 
 
@@ -289,6 +683,8 @@ def api_demo():
     return flask.jsonify({"AA": 124})
 
 @app.route("/api/genes/<gene_id>", methods=["GET"])
+@conditional_get
+@cached_response
 def api_gene_by_id(gene_id):
     """
     API endpoint to fetch gene information by gene ID.
@@ -313,6 +709,19 @@ def api_gene_by_id(gene_id):
     return flask.jsonify(info)
 
 # Pour aller plus loin : PUT method
+def _api_error(resp_code):
+    """
+    Build the JSON error response of an API write route.
+    Parameters:
+        resp_code (int): The response code returned by tp7.edition_gene.
+    Returns:
+        tuple: The Flask JSON response ({"error": message}) and its status code,
+        looked up in _API_ERRORS (500 for any unknown code).
+    """
+    message, status = _API_ERRORS.get(resp_code, _API_INTERNAL_ERROR)
+    return flask.jsonify({"error": message}), status
+
+
 @app.route("/api/genes/<gene_id>", methods=["PUT"])
 def api_edit_gene_by_id(gene_id):
     """
@@ -335,50 +744,58 @@ def api_edit_gene_by_id(gene_id):
     Raises:
         None.
     """
-    resp_code = api.edition_gene("update", flask.request.get_json(), gene_id=gene_id)
-    if resp_code == 200:
-        return flask.jsonify({"edited": flask.url_for('api_gene_by_id', gene_id=gene_id)}), 200
-    elif resp_code == 201:
-        return flask.jsonify({"created": flask.url_for('api_gene_by_id', gene_id=gene_id)}), 201
-    elif resp_code == 400:
-        return flask.jsonify({"error": "Bad Request"}), 400
-    elif resp_code == 404:
-        return flask.jsonify({"error": "Not Found - Gene ID does not exist"}), 404
-    else:
-        return flask.jsonify({"error": "Internal Server Error"}), 500
+    data = flask.request.get_json()
+    # edition_gene validates the data (400) before any database access
+    resp_code = api.edition_gene("update", data, gene_id=gene_id)
+    key = _API_PUT_RESULTS.get(resp_code)
+    if key is None:
+        return _api_error(resp_code)
+    invalidate_cache()
+    return flask.jsonify({key: flask.url_for('api_gene_by_id', gene_id=gene_id)}), resp_code
 
 
 # End pour aller plus loin
 
 @app.route("/api/genes")
+@conditional_get
+@cached_response
 def api_collection_of_genes():
     """
-    API endpoint to fetch a collection of genes with pagination.
+    API endpoint to fetch a collection of genes with keyset pagination.
     Utilizes the tp7.collection_of_genes function to retrieve data.
     Query Parameters:
-        offset (int, optional): The offset for pagination. Defaults to 0 if not provided.
+        after (str, optional): The gene ID of the last gene of the previous page,
+            as given by the "next" link. Defaults to the first page if not provided.
     Returns:
-        A Flask JSON response object containing a list of gene information.
+        A Flask JSON response object containing a list of gene information, the
+        IDs of the first and last genes of the page and the link to the next page
+        (null on the last page).
     Raises:
         None.
     Side effects:
         None.
     """
     
-    offset = flask.request.args.get("offset", default=0, type=int)
+    after = flask.request.args.get("after", default="")
     # Could also add a length parameter to limit the number of returned rows
 
-    rows = api.collection_of_genes(offset)
-    for row in rows:
-        row["href"] = flask.url_for('api_gene_by_id', gene_id=row["Ensembl_Gene_ID"])
+    # Build the route prefix once, then append each quoted ID the way url_for would
+    href_prefix = flask.url_for('api_gene_by_id', gene_id='_')[:-1]
+    # The page is bounded (COLLECTION_PAGE_SIZE) and cached as a whole, so it is
+    # collected in a single pass over the generator instead of streamed
+    rows = []
+    for row in api.collection_of_genes(after):
+        row["href"] = href_prefix + urllib.parse.quote(row["Ensembl_Gene_ID"], safe=_URL_PATH_SAFE)
+        rows.append(row)
     
     # Pour aller plus loin : now json object
+    last_id = rows[-1]["Ensembl_Gene_ID"] if rows else None
     new_json = {
         "items": rows,
-        "first": offset + 1,
-        "last": offset + len(rows),
-        "prev": flask.url_for('api_collection_of_genes', offset=max(0, offset - 100)),
-        "next": flask.url_for('api_collection_of_genes', offset=offset + 100)
+        "first": rows[0]["Ensembl_Gene_ID"] if rows else None,
+        "last": last_id,
+        "next": flask.url_for('api_collection_of_genes', after=last_id)
+            if len(rows) == sql_requests.COLLECTION_PAGE_SIZE else None
     }
 
     return flask.jsonify(new_json)
@@ -411,38 +828,31 @@ def api_edition_gene():
     """
     if flask.request.method == "POST":
         data = flask.request.get_json()
+        # edition_gene validates every gene of a bulk (400) before any database access
         resp_code = api.edition_gene("new", data)
-        if resp_code == 201:
-            if type(data) is dict:
-                return flask.jsonify({"created": flask.url_for('api_gene_by_id', gene_id=data["Ensemble_Gene_ID"])}), 201
-            # Pour aller plus loin
-            if type(data) is list:
-                created_urls = [flask.url_for('api_gene_by_id', gene_id=gene["Ensemble_Gene_ID"]) for gene in data]
-                return flask.jsonify(
-                    {"created": created_urls,
-                     "bulks_count": math.ceil(len(created_urls)/100)}
-                    ), 201
-        elif resp_code == 400:
-            return flask.jsonify({"error": "Bad Request"}), 400
-        elif resp_code == 409:
-            return flask.jsonify({"error": "Conflict - Gene ID already exists"}), 409
-        
-        else:
-            return flask.jsonify({"error": "Internal Server Error"}), 500
+        if resp_code != 201:
+            return _api_error(resp_code)
+        invalidate_cache()
+        if type(data) is dict:
+            return flask.jsonify({"created": flask.url_for('api_gene_by_id', gene_id=data["Ensemble_Gene_ID"])}), 201
+        # Pour aller plus loin
+        created_urls = [flask.url_for('api_gene_by_id', gene_id=gene["Ensemble_Gene_ID"]) for gene in data]
+        return flask.jsonify(
+            {"created": created_urls,
+             "bulks_count": math.ceil(len(created_urls)/api.BULK_SIZE)}
+            ), 201
         
     elif flask.request.method == "DELETE":
         data = flask.request.get_json()
+        if type(data) is not dict or type(data.get("Ensemble_Gene_ID")) is not str:
+            return _api_error(400)
         resp_code = api.edition_gene("delete", data)
+        invalidate_cache() # the gene may have been deleted even if an error was reported
 
         # Note : according to the indications, we should return 200 even if the gene did not exist
         if resp_code == 200:
             return flask.jsonify({"deleted": data["Ensemble_Gene_ID"]}), 200
-        elif resp_code == 400:
-            return flask.jsonify({"error": "Bad Request"}), 400
-        elif resp_code == 404:
-            return flask.jsonify({"error": "Not Found - Gene ID does not exist"}), 404 
-        else:
-            return flask.jsonify({"error": "Internal Server Error"}), 500
+        return _api_error(resp_code)
         
     # Pour aller plus loin : PUT
     elif flask.request.method == "PUT":
@@ -3,6 +3,9 @@ This script is an extension of TP4, as it will provide additional functionalitie
 """
 import sql_requests
 import sqlite3
+import logging
+
+logger = logging.getLogger(__name__)
 
 def gene_by_id(id):
     """
@@ -26,37 +29,62 @@ def gene_by_id(id):
     if gene_info is None:
         return None # then tp4's route will handle the 404 error
     
-    buffer = {}
-    for info in gene_info.keys():
-        buffer[info] = gene_info[info]
-    
-    buffer["transcript"] = []
-    for transcript in transcript_info:
-        transcript_dict = {}
-        for info in transcript.keys():
-            transcript_dict[info] = transcript[info]
-        buffer["transcript"].append(transcript_dict)
-    
-    buffer["parts"] = []
-    for part in parts_info:
-        buffer["parts"].append(part["atlas_organism_part"])
+    buffer = dict(gene_info)
+    buffer["transcript"] = transcript_info # already a fresh list of dicts (decoded from JSON)
+    buffer["parts"] = [part["Atlas_Organism_Part"] for part in parts_info]
 
     # Return data as dictionaries for easier JSON serialization
     return buffer
 
-def collection_of_genes(offset=0):
+def collection_of_genes(after_id=None):
     """
     Fetches a collection of distinct genes and their associated names with pagination.
     This function is intended to be used as part of a Web API to provide gene data in
     a structured format (e.g., JSON).
     Args:
-        offset (int): The offset for pagination.
+        after_id (str, optional): The Ensembl gene ID of the last gene of the previous
+            page. Defaults to None (first page).
+    Returns:
+        generator of dict: Dictionaries, each containing distinct gene information
+            and their associated names, converted one by one as the cursor is read.
+    """
+    rows = sql_requests.fetch_collection_of_genes(after_id)
+    return (dict(row) for row in rows)
+
+BULK_SIZE = 10000 # genes per executemany call when inserting a list of genes
+
+REQUIRED_GENE_FIELDS = frozenset(("Ensemble_Gene_ID", "Chromosome_Name", "Band", "Gene_Start", "Gene_End"))
+OPTIONAL_GENE_FIELDS = frozenset(("Strand", "Associated_Gene_Name"))
+ALLOWED_GENE_FIELDS = REQUIRED_GENE_FIELDS | OPTIONAL_GENE_FIELDS
+
+def validate_gene_data(data):
+    """
+    Checks the shape of the provided gene data, without querying the database:
+    required fields, value types and positions. Used by edition_gene to
+    reject bad requests before any database access.
+    Args:
+        data (dict): The gene data to be checked.
     Returns:
-        list of dict: A list of dictionaries, each containing distinct gene information
-            and their associated names.
+        int: 201 if the data is valid, 400 (Bad Request) otherwise.
     """
-    rows = sql_requests.fetch_collection_of_genes(offset)
-    return [dict(row) for row in rows]
+    if not isinstance(data, dict):
+        return 400
+    keys = data.keys() # one view for all the field checks
+    if not keys >= REQUIRED_GENE_FIELDS: # subset test on the keys view, no temporary set
+        return 400
+    if keys - ALLOWED_GENE_FIELDS: # unknown fields
+        return 400
+    start, end = data["Gene_Start"], data["Gene_End"]
+    # bool is a subclass of int, but JSON true/false are not positions
+    if not (isinstance(start, int) and isinstance(end, int)) or isinstance(start, bool) or isinstance(end, bool):
+        return 400
+    if start < 0 or start > end:
+        return 400
+    if "Strand" in keys and (not isinstance(data["Strand"], int) or isinstance(data["Strand"], bool)):
+        return 400
+    if "Associated_Gene_Name" in keys and not isinstance(data["Associated_Gene_Name"], str):
+        return 400
+    return 201
 
 def verification_data_gene(data):
     """
@@ -66,31 +94,11 @@ def verification_data_gene(data):
     Returns:
         int: The HTTP response code indicating the result of the verification.
     """
-    resp_code = 201  # Created
-        # Data validation
-    required_fields = ["Ensemble_Gene_ID", "Chromosome_Name", "Band", "Gene_Start",  "Gene_End"]
+    resp_code = validate_gene_data(data)
+    if resp_code != 201:
+        return resp_code # invalid data is reported as such, even for an existing gene
 
-    if len([field for field in required_fields if field not in data]) > 0:
-        resp_code = 400  # Bad Request
-    
-    if type(data["Gene_Start"]) is not int or type(data["Gene_End"]) is not int:
-        resp_code = 400  # Bad Request
-    
-    if data["Gene_Start"] < 0 or data["Gene_End"] < 0 or data["Gene_Start"] > data["Gene_End"]:
-        resp_code = 400  # Bad Request
-    
-    if "Strand" in data and type(data["Strand"]) is not int:
-        resp_code = 400  # Bad Request
-    
-    if "Associated_Gene_Name" in data and type(data["Associated_Gene_Name"]) is not str:
-        resp_code = 400  # Bad Request
-
-    if len(data.keys()) > len(required_fields) + 2:  # +2 for optional fields
-        resp_code = 400  # Bad Request
-
-    resp_code = 409 if sql_requests.check_gene_exists(data["Ensemble_Gene_ID"]) else resp_code
-
-    return resp_code
+    return 409 if sql_requests.check_gene_exists(data["Ensemble_Gene_ID"]) else resp_code
 
 
 def edition_gene(mode, data, gene_id=None):
@@ -120,7 +128,8 @@ def edition_gene(mode, data, gene_id=None):
                     data.get("Strand"),
                     data.get("Associated_Gene_Name")
                 )
-            except:
+            except sqlite3.Error:
+                logger.debug("edition_gene(%r): database error", mode, exc_info=True)
                 resp_code = 500  # Internal Server Error (e.g., DB constraint violation)
     elif mode == "new" and type(data) is list:
         """
@@ -133,66 +142,62 @@ def edition_gene(mode, data, gene_id=None):
                 break # Stop at first error
         """
         """
-        Creating bulk insertion with transaction management
+        Creating bulk insertion with transaction management: all the chunks are
+        inserted in one transaction, and existing IDs are detected by the insert
+        itself (no SELECT per gene)
         """
         resp_code = 201  # Created
-        bulk = []
+        bulk = [] # rows ready for the insert, built while validating
         for item in data:
-            code = verification_data_gene(item)
+            code = validate_gene_data(item)
             if code != 201:
                 resp_code = code
                 break
-            bulk.append(item)
-        bulks_size = 100
-        for i in range(0, len(bulk), bulks_size):
-            chunk = bulk[i:i+bulks_size]
+            bulk.append((
+                item["Ensemble_Gene_ID"],
+                item["Chromosome_Name"],
+                item["Band"],
+                item["Gene_Start"],
+                item["Gene_End"],
+                item.get("Strand"),
+                item.get("Associated_Gene_Name")
+            ))
+        if resp_code == 201:
+            bulks_size = BULK_SIZE
             try:
-                sql_requests.insert_bulk_new_genes(chunk)
-            except:
+                with sql_requests.bulk_transaction() as conn:
+                    inserted = 0
+                    for i in range(0, len(bulk), bulks_size):
+                        inserted += sql_requests.insert_bulk_new_genes(bulk[i:i+bulks_size])
+                    if inserted != len(bulk):
+                        conn.rollback() # all or nothing
+                        resp_code = 409  # Conflict - at least one gene ID already exists
+            except sqlite3.Error:
+                logger.debug("edition_gene(%r): database error", mode, exc_info=True)
                 resp_code = 500  # Internal Server Error (e.g., DB constraint violation)
-                break
 
     elif mode == "delete":
+        # According to the instruction, deleting a missing gene also returns 200:
+        # the DELETE is a no-op then, no need to check for the gene first
         resp_code = 200  # OK
-        if not sql_requests.check_gene_exists(data["Ensemble_Gene_ID"]):
-            resp_code = 404 # Not Found
-            resp_code = 200 # According to the instruction, always return 200
-        else:
-            try:
-                sql_requests.delete_gene(data["Ensemble_Gene_ID"])
-            except:
-                resp_code = 500  # Internal Server Error (e.g., DB constraint violation)
-            finally:
-                resp_code = 200 # According to the instruction
+        try:
+            sql_requests.delete_gene(data["Ensemble_Gene_ID"])
+        except sqlite3.Error:
+            logger.debug("edition_gene(%r): database error", mode, exc_info=True)
+            resp_code = 500  # Internal Server Error (e.g., DB constraint violation)
 
     # Pour aller plus loin : implement "update" mode here
     elif mode == "update":
-        resp_code = verification_data_gene(data)
-        if gene_id != data["Ensemble_Gene_ID"]:
+        resp_code = validate_gene_data(data)
+        if resp_code == 201 and gene_id != data["Ensemble_Gene_ID"]:
             resp_code = 400  # Bad Request
 
-        # Check if gene exists for update
-        if resp_code in [201, 409]:
-            resp_code = 200 if resp_code == 409 else 201 # OK (updated or Created)
-        
-        # If gene does not exist, create it
+        # One upsert creates or updates the gene, the existence check only picks the status
         if resp_code == 201:
+            if sql_requests.check_gene_exists(gene_id):
+                resp_code = 200 # OK (updated)
             try:
-                sql_requests.insert_new_gene(
-                    data["Ensemble_Gene_ID"],
-                    data["Chromosome_Name"],
-                    data["Band"],
-                    data["Gene_Start"],
-                    data["Gene_End"],
-                    data.get("Strand"),
-                    data.get("Associated_Gene_Name")
-                )
-            except:
-                resp_code = 500  # Internal Server Error (e.g., DB constraint violation)
-        # If gene exists, update it
-        elif resp_code == 200:
-            try:
-                sql_requests.update_gene(
+                sql_requests.upsert_gene(
                     data["Ensemble_Gene_ID"],
                     data["Chromosome_Name"],
                     data["Band"],
@@ -201,7 +206,8 @@ def edition_gene(mode, data, gene_id=None):
                     data.get("Strand"),
                     data.get("Associated_Gene_Name")
                 )
-            except:
+            except sqlite3.Error:
+                logger.debug("edition_gene(%r): database error", mode, exc_info=True)
                 resp_code = 500  # Internal Server Error (e.g., DB constraint violation)
     else:
         resp_code = 400  # Bad Request (invalid mode)